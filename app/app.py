@@ -13,6 +13,13 @@ from dotenv import load_dotenv
 from app.data_validation import validate
 from app.config.log_config import setup_logging
 from app.scrap import Scrap
+from app.session_store import (
+    key_configured,
+    load_session,
+    new_session_id,
+    remove_expired_sessions,
+    save_session,
+)
 from app.config.state import worker_id
 from app.log_view import debug_logs_view, security
 from fastapi.security import HTTPBasicCredentials
@@ -33,6 +40,8 @@ semaphore = None
 async def lifespan(app: FastAPI):
     global playwright, browser, semaphore
     semaphore = asyncio.Semaphore(3)
+    if key_configured():
+        remove_expired_sessions()
     playwright = await async_playwright().start()
     browser = await playwright.chromium.launch(
         args=[
@@ -53,6 +62,7 @@ app = FastAPI(lifespan=lifespan)
 
 app.mount("/pdf", StaticFiles(directory="static/pdf"), name="cnd")
 app.mount("/error", StaticFiles(directory="static/error"), name="cnd")
+app.mount("/ref", StaticFiles(directory="static/ref"), name="ref")
 
 
 @app.get("/debug")
@@ -94,8 +104,28 @@ async def _execute_scrap_internal(request: Request) -> dict:
 
     data = response["data"]
     timeout = data.pop("timeout", None)
-
-    scrapper = Scrap(browser=browser, browser_session=data.get("browser_session"))
+    inline_refs = data.pop("inline_refs", False)
+    session_id = data.pop("session_id", None)
+    session_ttl = data.pop("session_ttl", None)
+    persist_session = data.pop("save_session", False)
+
+    if (session_id or persist_session) and not key_configured():
+        raise HTTPException(
+            status_code=500,
+            detail="Chave do armazenamento de sessões ausente ou inválida no servidor",
+        )
+
+    browser_session = data.get("browser_session")
+    session_restored = False
+    if session_id and not browser_session:
+        browser_session = await asyncio.to_thread(load_session, session_id)
+        session_restored = browser_session is not None
+
+    scrapper = Scrap(
+        browser=browser,
+        browser_session=browser_session,
+        session_id=session_id if session_restored else None,
+    )
     await scrapper.start()
 
     if timeout:
@@ -113,18 +143,47 @@ async def _execute_scrap_internal(request: Request) -> dict:
         if resultado:
             await scrapper.context.close()
             await scrapper.page.close()
-            raise HTTPException(status_code=500, detail=resultado)
+            status_code = 500
+            if step["func"] == "check_session":
+                status_code = resultado.get("status_code", 500)
+            raise HTTPException(status_code=status_code, detail=resultado)
+
+    session_saved = False
+    try:
+        if persist_session:
+            # Só sobrescreve uma sessão que o cliente comprovadamente já possuía.
+            target_id = session_id if session_restored else new_session_id()
+            storage_state = await scrapper.context.storage_state()
+            await asyncio.to_thread(
+                save_session, target_id, storage_state, session_ttl
+            )
+            session_id = target_id
+            session_saved = True
+    except Exception as e:
+        logger.error(
+            "Worker: %s || Falha ao salvar a sessão",
+            worker_id.get(),
+            extra={"extra": {"erro": str(e), "worker": worker_id.get()}},
+        )
+    finally:
+        await scrapper.close()
 
-    await scrapper.close()
     retorno = {
         "status": "success",
         "message": "Scraping executado com sucesso",
         "data": {
-            "atributes_read": scrapper.ref,
+            "atributes_read": await scrapper.offload_refs(inline=inline_refs),
             "files_saved": scrapper.files_saved,
         },
     }
 
+    if session_id or persist_session:
+        retorno["session"] = {
+            "id": session_id,
+            "restored": session_restored,
+            "saved": session_saved,
+        }
+
     return retorno
 
 
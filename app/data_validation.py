@@ -1,5 +1,5 @@
 from typing import Any
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, Field, ValidationError
 from enum import Enum
 from typing import Optional
 
@@ -16,6 +16,7 @@ class StepFunc(str, Enum):
     click = "click"
     select_option = "select_option"
     select = "select"
+    check_session = "check_session"
     save_file = "save_file"
     page_to_pdf = "page_to_pdf"
     set_timeout = "set_timeout"
@@ -38,6 +39,10 @@ class DataRequest(BaseModel):
     timeout: Optional[int] = None
     steps: list[Step]
     browser_session: Optional[dict] = None
+    inline_refs: bool = False
+    session_id: Optional[str] = None
+    save_session: bool = False
+    session_ttl: Optional[int] = Field(None, gt=0)
 
     class Config:
         extra = "forbid"
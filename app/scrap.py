@@ -1,5 +1,6 @@
 import concurrent.futures
 from app.config.state import worker_id
+from app.session_store import invalidate_session
 from twocaptcha import TwoCaptcha
 import logging
 import re
@@ -8,16 +9,60 @@ import os
 import asyncio
 from playwright.async_api import async_playwright, expect
 import base64
-from typing import Optional
+import hashlib
+import time
+from typing import Any, Optional
 
 logger = logging.getLogger("app")
 
 
+def _truncate(data: Any, limit: int) -> Any:
+    if isinstance(data, dict):
+        return {k: _truncate(v, limit) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_truncate(i, limit) for i in data]
+    if isinstance(data, str) and len(data) > limit:
+        return f"{data[:limit]}... [truncado, {len(data)} caracteres]"
+    return data
+
+
+def _write_ref(path: str, value: str, limit: int) -> Any:
+    content = value.encode("utf-8")
+    if len(content) <= limit:
+        return value
+
+    os.makedirs(path, exist_ok=True)
+    file_name = os.urandom(16).hex() + ".txt"
+    with open(os.path.join(path, file_name), "wb") as f:
+        f.write(content)
+
+    return {
+        "url": f"/ref/{file_name}",
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+def _remove_expired_refs(path: str, max_age: int):
+    if not os.path.isdir(path):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(path):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+
+
 class Scrap:
-    def __init__(self, browser=None, browser_session=None, **launch_options):
+    def __init__(
+        self, browser=None, browser_session=None, session_id=None, **launch_options
+    ):
         self.external_browser = browser
         self.launch_options = launch_options
         self.browser_session = browser_session
+        self.session_id = session_id
         self.ref: dict = {}
         self.files_saved: list = []
         self.iter_args: dict = {}
@@ -60,10 +105,13 @@ class Scrap:
                     if should_retry:
                         continue
                     else:
+                        params = _truncate(
+                            kwargs, int(os.getenv("LOG_VALUE_LIMIT", 1024))
+                        )
                         extra = {
                             "erro": str(e),
                             "func": func.__name__,
-                            "params": kwargs,
+                            "params": params,
                             "worker": worker_id.get(),
                         }
 
@@ -87,7 +135,7 @@ class Scrap:
                             "message": type(e).__name__,
                             "details": {
                                 "name": func.__name__,
-                                "args": kwargs,
+                                "args": params,
                                 "screenshot_url": file_name,
                             },
                         }
@@ -199,6 +247,21 @@ class Scrap:
                 },
             }
 
+    @scrap_wrapper
+    async def check_session(self, xpath: str, **kwargs):
+        if await self.page.locator(xpath).count() > 0:
+            if self.session_id:
+                await asyncio.to_thread(invalidate_session, self.session_id)
+            return {
+                "status_code": 401,
+                "message": "Sessão expirada",
+                "details": {
+                    "func": "check_session",
+                    "session_id": self.session_id,
+                    "url": self.page.url,
+                },
+            }
+
     @scrap_wrapper
     async def save_file(self, xpath: str, path: str = "static/pdf", **kwargs):
         os.makedirs(path, exist_ok=True)
@@ -245,6 +308,21 @@ class Scrap:
 
         return img_src
 
+    async def offload_refs(
+        self, path: str = "static/ref", inline: bool = False
+    ) -> dict:
+        limit = int(os.getenv("REF_INLINE_LIMIT", 64 * 1024))
+        retention = int(os.getenv("REF_RETENTION", 24 * 3600))
+        await asyncio.to_thread(_remove_expired_refs, path, retention)
+
+        refs = {}
+        for name, value in self.ref.items():
+            if inline or not isinstance(value, str):
+                refs[name] = value
+            else:
+                refs[name] = await asyncio.to_thread(_write_ref, path, value, limit)
+        return refs
+
     async def _replace_text(self, text: str):
         if text.startswith("$ref/"):
             return self.ref[text.split("$ref/")[1]]
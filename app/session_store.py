@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import os
+import secrets
+import time
+from pathlib import Path
+from typing import Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+
+logger = logging.getLogger("app")
+
+SESSIONS_DIR = Path("sessions")
+
+
+def _fernet() -> Fernet:
+    return Fernet(os.environ["SESSION_STORE_KEY"])
+
+
+def key_configured() -> bool:
+    try:
+        _fernet()
+    except (KeyError, ValueError):
+        return False
+    return True
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def _session_path(session_id: str) -> Path:
+    return SESSIONS_DIR / f"{hashlib.sha256(session_id.encode()).hexdigest()}.bin"
+
+
+def _read_payload(path: Path) -> Optional[dict]:
+    try:
+        token = path.read_bytes()
+    except OSError:
+        return None
+
+    try:
+        payload = json.loads(_fernet().decrypt(token))
+        if payload["expires_at"] < time.time():
+            return None
+        return payload
+    except (InvalidToken, ValueError, KeyError, TypeError):
+        logger.warning("Sessão '%s' ilegível, removendo", path.name)
+        return None
+
+
+def save_session(session_id: str, storage_state: dict, ttl: Optional[int] = None):
+    if ttl is None:
+        ttl = int(os.getenv("SESSION_TTL", 12 * 3600))
+    expires_at = time.time() + ttl
+    payload = {"expires_at": expires_at, "storage_state": storage_state}
+    token = _fernet().encrypt(json.dumps(payload).encode("utf-8"))
+
+    SESSIONS_DIR.mkdir(exist_ok=True)
+    path = _session_path(session_id)
+    tmp_path = path.with_suffix(f".{os.urandom(4).hex()}.tmp")
+    tmp_path.write_bytes(token)
+    # O mtime guarda a expiração para a limpeza não precisar descriptografar.
+    os.utime(tmp_path, (expires_at, expires_at))
+    os.replace(tmp_path, path)
+
+    remove_expired_sessions()
+
+
+def load_session(session_id: str) -> Optional[dict]:
+    path = _session_path(session_id)
+    payload = _read_payload(path)
+    if payload is None:
+        path.unlink(missing_ok=True)
+        return None
+
+    return payload["storage_state"]
+
+
+def invalidate_session(session_id: str):
+    _session_path(session_id).unlink(missing_ok=True)
+
+
+def remove_expired_sessions():
+    if not SESSIONS_DIR.exists():
+        return
+    now = time.time()
+    for path in SESSIONS_DIR.glob("*.bin"):
+        try:
+            if path.stat().st_mtime < now:
+                path.unlink(missing_ok=True)
+        except OSError:
+            continue